@@ -2,20 +2,228 @@ import pandas as pd
 from datetime import datetime, timedelta
 from mock_data import get_restaurant_data
 import logging
+import threading
+import weakref
 from database import Database
+from follower_series import FollowerTimeSeries
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+POST_COLUMNS = ['restaurant', 'followers', 'post_date', 'likes', 'comments', 'hashtags']
+TOP_HASHTAGS_PER_RESTAURANT = 5
+# The trigram index behind substring search needs at least three characters;
+# shorter substring queries fall back to prefix matching
+MIN_SUBSTRING_QUERY_LENGTH = 3
+# Trends compare engagement before and after this point in the past
+TREND_WINDOW = timedelta(days=14)
+
+
+def build_restaurant_summaries(data, follower_counts=None):
+    """Compute the detail-view summary of every restaurant in one pass.
+
+    Returns a dict keyed by restaurant handle with average likes and
+    comments, followers, post count and the top hashtags by frequency.
+    Followers come from `follower_counts` where available, else the posts.
+    """
+    follower_counts = follower_counts or {}
+    if data.empty:
+        return {}
+
+    grouped = data.groupby('restaurant', sort=False)
+    stats = grouped.agg(
+        avg_likes=('likes', 'mean'),
+        avg_comments=('comments', 'mean'),
+        followers=('followers', 'first'),
+        total_posts=('likes', 'size')
+    )
+
+    # One row per (post, hashtag), counted per restaurant
+    tags = data[['restaurant', 'hashtags']].dropna()
+    tags = tags.assign(hashtag=tags['hashtags'].str.split(',')).explode('hashtag')
+    counts = (tags.groupby(['restaurant', 'hashtag'], sort=False).size()
+              .sort_values(ascending=False, kind='stable')
+              .groupby(level='restaurant', sort=False)
+              .head(TOP_HASHTAGS_PER_RESTAURANT))
+    top_hashtags = {
+        restaurant: pd.Series(group.values, index=group.index.get_level_values('hashtag').values,
+                              name='count')
+        for restaurant, group in counts.groupby(level='restaurant', sort=False)
+    }
+
+    return {
+        row.Index: {
+            'avg_likes': row.avg_likes,
+            'avg_comments': row.avg_comments,
+            'followers': follower_counts.get(row.Index, row.followers),
+            'top_hashtags': top_hashtags.get(row.Index, pd.Series(dtype='int64', name='count')),
+            'total_posts': row.total_posts
+        }
+        # itertuples keeps integer columns as ints, unlike iterrows
+        for row in stats.itertuples()
+    }
+
+
+class DataSnapshot:
+    """Immutable, versioned view of the tracked restaurants and their posts.
+
+    A snapshot is never modified after it is published. Writers build a new
+    DataFrame and publish a new snapshot, so readers holding an older one keep
+    seeing consistent data until they let go of it. Per-restaurant summaries
+    are computed once here, when the data changes, rather than on every read.
+    """
+
+    def __init__(self, version, restaurants, data, follower_counts=None,
+                 baseline_follower_counts=None):
+        self._version = version
+        self._restaurants = tuple(restaurants)
+        self._data = data
+        self._follower_counts = follower_counts or {}
+        self._baseline_follower_counts = baseline_follower_counts or {}
+        self._summaries = build_restaurant_summaries(data, self._follower_counts)
+        self._created_at = datetime.now()
+
+    @property
+    def version(self):
+        return self._version
+
+    @property
+    def restaurants(self):
+        """Tracked restaurant handles at the time the snapshot was published"""
+        return self._restaurants
+
+    @property
+    def data(self):
+        """Post data for the tracked restaurants; treat as read-only"""
+        return self._data
+
+    @property
+    def follower_counts(self):
+        """Latest follower count per handle from the follower time series"""
+        return self._follower_counts
+
+    @property
+    def baseline_follower_counts(self):
+        """Follower count per handle at the start of the trend window"""
+        return self._baseline_follower_counts
+
+    @property
+    def summaries(self):
+        """Precomputed summary per restaurant handle; treat as read-only"""
+        return self._summaries
+
+    @property
+    def created_at(self):
+        return self._created_at
+
+
 class InstagramDataHandler:
-    def __init__(self):
+    def __init__(self, db_path='instagram_analytics.db'):
         """Initialize with database connection and empty data"""
         logger.info("Initializing InstagramDataHandler")
-        self.db = Database()
-        self.data = pd.DataFrame()
+        self.db = Database(db_path)
+        self.follower_series = FollowerTimeSeries(self.db)
+        # Only writers take this lock; readers just grab the current snapshot
+        self._write_lock = threading.Lock()
+        self._version = 0
+        # Unreferenced snapshots drop out of here once they are garbage-collected
+        self._live_snapshots = weakref.WeakValueDictionary()
+        self._snapshot = None
+        with self._write_lock:
+            self._publish([], pd.DataFrame(columns=POST_COLUMNS))
         self.refresh_data()
 
+    @property
+    def data(self):
+        """Post data from the current snapshot"""
+        return self._snapshot.data
+
+    def get_snapshot(self):
+        """Get the current data snapshot; pin it for the length of a render"""
+        return self._snapshot
+
+    def get_live_snapshot_versions(self):
+        """Get the versions of all snapshots that are still referenced"""
+        return sorted(self._live_snapshots.keys())
+
+    def _publish(self, restaurants, data):
+        """Publish a new snapshot. Callers must hold the write lock."""
+        self._version += 1
+        follower_counts, baseline_follower_counts = {}, {}
+        if restaurants:
+            try:
+                follower_counts = self.follower_series.latest_counts()
+                baseline_follower_counts = self.follower_series.latest_counts(
+                    datetime.now() - TREND_WINDOW)
+            except Exception as e:
+                # Fall back to the follower counts on the post rows
+                logger.error(f"Error loading follower counts: {str(e)}")
+        snapshot = DataSnapshot(self._version, restaurants, data,
+                                follower_counts, baseline_follower_counts)
+        self._live_snapshots[snapshot.version] = snapshot
+        # A single reference swap, so readers see either the old or new version
+        self._snapshot = snapshot
+        logger.info(f"Published data snapshot v{snapshot.version} "
+                    f"({len(data)} rows, {len(restaurants)} restaurants)")
+        return snapshot
+
+    def _fetch_restaurant_data(self, restaurants):
+        """Fetch post data for the given restaurants"""
+        new_data = get_restaurant_data(restaurants)
+
+        if new_data is None:
+            logger.error("get_restaurant_data returned None")
+            raise ValueError("No data received from get_restaurant_data")
+
+        if new_data.empty:
+            logger.error("get_restaurant_data returned empty DataFrame")
+            raise ValueError("Empty DataFrame received from get_restaurant_data")
+
+        # Filter data to only include requested restaurants
+        new_data = new_data[new_data['restaurant'].isin(restaurants)]
+
+        # Verify datetime format
+        if not pd.api.types.is_datetime64_any_dtype(new_data['post_date']):
+            logger.warning("Converting post_date to datetime")
+            new_data = new_data.assign(post_date=pd.to_datetime(new_data['post_date']))
+
+        self._record_followers(new_data)
+        return new_data
+
+    def _record_followers(self, data):
+        """Store the latest follower count of each restaurant in the time series"""
+        try:
+            latest = data.sort_values('post_date').groupby('restaurant')['followers'].last()
+            self.follower_series.record(latest.to_dict())
+        except Exception as e:
+            # Follower history is secondary; never fail a data load over it
+            logger.error(f"Error recording follower history: {str(e)}")
+
+    def _sync_tracked_restaurants(self):
+        """Publish a snapshot matching the tracked list, reusing existing rows.
+
+        Copy-on-write: rows of restaurants still tracked are carried over from
+        the current snapshot, and only newly tracked restaurants are fetched.
+        """
+        with self._write_lock:
+            current = self._snapshot
+            restaurants = self._load_tracked_restaurants()
+
+            data = current.data[current.data['restaurant'].isin(restaurants)]
+            already_loaded = set(current.restaurants)
+            missing = [r for r in restaurants if r not in already_loaded]
+            if missing:
+                new_data = self._fetch_restaurant_data(missing)
+                # Concatenating onto an empty (object-dtype) frame would turn
+                # every column into object, so only concat real rows
+                if data.empty:
+                    data = new_data.reset_index(drop=True)
+                else:
+                    data = pd.concat([data, new_data], ignore_index=True)
+
+            self._publish(restaurants, data)
+
     def add_restaurant(self, restaurant_handle):
         """Add a restaurant to track"""
         if not restaurant_handle.startswith('@'):
@@ -27,7 +235,7 @@ class InstagramDataHandler:
                 "INSERT OR IGNORE INTO restaurants (handle) VALUES (?)",
                 (restaurant_handle,)
             )
-            self.refresh_data()
+            self._sync_tracked_restaurants()
         except Exception as e:
             logger.error(f"Error adding restaurant: {str(e)}")
             raise Exception(f"Failed to add restaurant: {str(e)}")
@@ -36,77 +244,138 @@ class InstagramDataHandler:
         """Remove a restaurant from tracking"""
         logger.info(f"Removing restaurant: {restaurant_handle}")
         try:
+            rows = self.db.execute_query(
+                "SELECT id FROM restaurants WHERE handle = ?",
+                (restaurant_handle,)
+            )
             self.db.execute_query(
                 "DELETE FROM restaurants WHERE handle = ?",
                 (restaurant_handle,)
             )
-            self.refresh_data()
+            # History goes only once the restaurant row is gone. If this fails
+            # the leftover rows are unreachable: ids are never reused.
+            if rows:
+                try:
+                    self.follower_series.delete(rows[0]['id'])
+                except Exception as e:
+                    logger.error(f"Error deleting follower history: {str(e)}")
+            self._sync_tracked_restaurants()
         except Exception as e:
             logger.error(f"Error removing restaurant: {str(e)}")
             raise Exception(f"Failed to remove restaurant: {str(e)}")
 
+    def _load_tracked_restaurants(self):
+        """Get list of currently tracked restaurants, raising on database errors.
+
+        Writers use this so a failed read can never publish an empty snapshot.
+        """
+        results = self.db.execute_query("SELECT handle FROM restaurants ORDER BY handle")
+        return [row['handle'] for row in results] if results else []
+
     def get_tracked_restaurants(self):
         """Get list of currently tracked restaurants"""
         try:
-            results = self.db.execute_query("SELECT handle FROM restaurants ORDER BY handle")
-            return [row['handle'] for row in results] if results else []
+            return self._load_tracked_restaurants()
         except Exception as e:
             logger.error(f"Error getting tracked restaurants: {str(e)}")
             return []
 
-    def refresh_data(self):
-        """Fetch fresh data with error handling"""
+    def _restaurant_search_filter(self, query, substring):
+        """Build the WHERE clause and params for a handle search"""
+        query = (query or '').strip()
+        if not query:
+            return "", ()
+
+        if substring and len(query) >= MIN_SUBSTRING_QUERY_LENGTH:
+            # Quoted as an FTS5 phrase, which the trigram tokenizer matches
+            # as a case-insensitive substring
+            return (
+                "WHERE id IN (SELECT rowid FROM restaurants_fts "
+                "WHERE restaurants_fts MATCH ?)",
+                ('"' + query.replace('"', '""') + '"',)
+            )
+
+        if not query.startswith('@'):
+            query = '@' + query
+        # Prefix range on the NOCASE index instead of LIKE so '_' in handles
+        # is matched literally
+        return (
+            "WHERE handle >= ? COLLATE NOCASE AND handle < ? COLLATE NOCASE",
+            (query, query + '\U0010ffff')
+        )
+
+    def search_restaurants(self, query='', limit=25, offset=0, substring=False):
+        """Get one page of tracked restaurants matching a handle prefix or substring"""
+        where, params = self._restaurant_search_filter(query, substring)
         try:
-            logger.info("Attempting to fetch fresh data")
-            restaurants = self.get_tracked_restaurants()
+            results = self.db.execute_query(
+                f"SELECT handle FROM restaurants {where} "
+                "ORDER BY handle COLLATE NOCASE LIMIT ? OFFSET ?",
+                params + (limit, offset)
+            )
+            return [row['handle'] for row in results] if results else []
+        except Exception as e:
+            logger.error(f"Error searching restaurants: {str(e)}")
+            return []
 
-            if not restaurants:
-                logger.info("No restaurants to track")
-                self.data = pd.DataFrame()
-                return
+    def count_restaurants(self, query='', substring=False):
+        """Count tracked restaurants matching a handle prefix or substring.
 
-            new_data = get_restaurant_data(restaurants)
+        Returns None if the count could not be read, so callers can tell a
+        database error apart from an empty list.
+        """
+        where, params = self._restaurant_search_filter(query, substring)
+        try:
+            results = self.db.execute_query(
+                f"SELECT COUNT(*) AS total FROM restaurants {where}",
+                params
+            )
+            return results[0]['total'] if results else 0
+        except Exception as e:
+            logger.error(f"Error counting restaurants: {str(e)}")
+            return None
 
-            if new_data is None:
-                logger.error("get_restaurant_data returned None")
-                raise ValueError("No data received from get_restaurant_data")
+    def refresh_data(self):
+        """Fetch fresh data with error handling.
 
-            if new_data.empty:
-                logger.error("get_restaurant_data returned empty DataFrame")
-                raise ValueError("Empty DataFrame received from get_restaurant_data")
+        The new data is published as a new snapshot; if fetching fails the
+        current snapshot stays in place.
+        """
+        try:
+            logger.info("Attempting to fetch fresh data")
+            with self._write_lock:
+                restaurants = self._load_tracked_restaurants()
 
-            # Filter data to only include tracked restaurants
-            new_data = new_data[new_data['restaurant'].isin(restaurants)]
+                if not restaurants:
+                    logger.info("No restaurants to track")
+                    self._publish([], pd.DataFrame(columns=POST_COLUMNS))
+                    return
 
-            # Verify datetime format
-            if not pd.api.types.is_datetime64_any_dtype(new_data['post_date']):
-                logger.warning("Converting post_date to datetime")
-                new_data['post_date'] = pd.to_datetime(new_data['post_date'])
+                new_data = self._fetch_restaurant_data(restaurants)
 
-            logger.info(f"Successfully loaded data with {len(new_data)} rows")
-            self.data = new_data
+                logger.info(f"Successfully loaded data with {len(new_data)} rows")
+                self._publish(restaurants, new_data)
 
         except Exception as e:
             logger.error(f"Error refreshing data: {str(e)}")
-            self.data = pd.DataFrame(columns=['restaurant', 'followers', 'post_date', 
-                                            'likes', 'comments', 'hashtags'])
             raise Exception(f"Failed to load data: {str(e)}")
 
-    def get_analytics_export_data(self):
+    def get_analytics_export_data(self, snapshot=None):
         """Compile all analytics data for export"""
         try:
             logger.info("Preparing analytics export data")
+            snapshot = snapshot or self.get_snapshot()
 
             # Get basic metrics
-            engagement_data = self.calculate_engagement_rates()
-            trending_data = self.get_restaurant_trends()
+            engagement_data = self.calculate_engagement_rates(snapshot)
+            trending_data = self.get_restaurant_trends(snapshot)
 
             # Prepare export dataframe
             export_data = []
 
-            for restaurant in self.get_tracked_restaurants():
+            for restaurant in snapshot.restaurants:
                 # Get restaurant summary
-                summary = self.get_restaurant_summary(restaurant)
+                summary = self.get_restaurant_summary(restaurant, snapshot)
                 if not summary:
                     logger.warning(f"No summary data available for {restaurant}")
                     continue
@@ -151,25 +420,27 @@ class InstagramDataHandler:
             logger.error(f"Error preparing export data: {str(e)}")
             raise
 
-    def calculate_engagement_rates(self):
+    def calculate_engagement_rates(self, snapshot=None):
         """Calculate engagement rates for each restaurant"""
         try:
-            if self.data.empty:
+            snapshot = snapshot or self.get_snapshot()
+            data = snapshot.data
+            if data.empty:
                 logger.warning("No data available for engagement calculation")
                 return pd.DataFrame(columns=['restaurant', 'engagement_rate'])
 
             engagement_data = []
-            tracked_restaurants = self.get_tracked_restaurants()
 
-            for restaurant in tracked_restaurants:
-                restaurant_posts = self.data[self.data['restaurant'] == restaurant]
+            for restaurant in snapshot.restaurants:
+                restaurant_posts = data[data['restaurant'] == restaurant]
 
                 if len(restaurant_posts) == 0:
                     continue
 
                 total_likes = restaurant_posts['likes'].sum()
                 total_comments = restaurant_posts['comments'].sum()
-                followers = restaurant_posts['followers'].iloc[0]
+                followers = snapshot.follower_counts.get(
+                    restaurant, restaurant_posts['followers'].iloc[0])
 
                 # Avoid division by zero
                 if followers == 0:
@@ -189,16 +460,17 @@ class InstagramDataHandler:
             logger.error(f"Error calculating engagement rates: {str(e)}")
             raise
 
-    def analyze_hashtags(self):
+    def analyze_hashtags(self, snapshot=None):
         """Analyze hashtag usage and trends"""
         try:
-            if self.data.empty:
+            snapshot = snapshot or self.get_snapshot()
+            data = snapshot.data
+            if data.empty:
                 logger.warning("No data available for hashtag analysis")
                 return pd.Series(dtype=float)
 
             # Filter data to only include tracked restaurants
-            tracked_restaurants = self.get_tracked_restaurants()
-            filtered_data = self.data[self.data['restaurant'].isin(tracked_restaurants)]
+            filtered_data = data[data['restaurant'].isin(snapshot.restaurants)]
 
             all_hashtags = []
             for hashtags in filtered_data['hashtags']:
@@ -215,19 +487,21 @@ class InstagramDataHandler:
             logger.error(f"Error analyzing hashtags: {str(e)}")
             raise
 
-    def get_restaurant_trends(self):
+    def get_restaurant_trends(self, snapshot=None):
         """Calculate restaurant trends over the past month"""
         try:
-            if self.data.empty:
+            snapshot = snapshot or self.get_snapshot()
+            data = snapshot.data
+            if data.empty:
                 logger.warning("No data available for trend analysis")
                 return pd.DataFrame(columns=['restaurant', 'growth_rate'])
 
             now = datetime.now()
-            two_weeks_ago = now - timedelta(days=14)
+            two_weeks_ago = now - TREND_WINDOW
 
             # Filter data to only include tracked restaurants
-            tracked_restaurants = self.get_tracked_restaurants()
-            filtered_data = self.data[self.data['restaurant'].isin(tracked_restaurants)]
+            tracked_restaurants = snapshot.restaurants
+            filtered_data = data[data['restaurant'].isin(tracked_restaurants)]
 
             recent_data = filtered_data[filtered_data['post_date'] >= two_weeks_ago]
             old_data = filtered_data[filtered_data['post_date'] < two_weeks_ago]
@@ -242,13 +516,20 @@ class InstagramDataHandler:
                     logger.warning(f"Insufficient data for trend analysis: {restaurant}")
                     continue
 
+                # Rate each period against the follower count of that period,
+                # so follower growth shows up in the trend
+                recent_followers = snapshot.follower_counts.get(
+                    restaurant, recent_engagement['followers'].iloc[0])
+                old_followers = snapshot.baseline_follower_counts.get(
+                    restaurant, old_engagement['followers'].iloc[0])
+
                 recent_rate = ((recent_engagement['likes'].mean() + 
                             recent_engagement['comments'].mean()) / 
-                            recent_engagement['followers'].iloc[0] * 100)
+                            recent_followers * 100)
 
                 old_rate = ((old_engagement['likes'].mean() + 
                             old_engagement['comments'].mean()) / 
-                            old_engagement['followers'].iloc[0] * 100)
+                            old_followers * 100)
 
                 growth = ((recent_rate - old_rate) / old_rate) * 100 if old_rate > 0 else 0
 
@@ -263,37 +544,25 @@ class InstagramDataHandler:
             logger.error(f"Error calculating restaurant trends: {str(e)}")
             raise
 
-    def get_restaurant_summary(self, restaurant):
-        """Get detailed summary for a specific restaurant"""
-        # Verify restaurant is being tracked
-        if restaurant not in self.get_tracked_restaurants():
-            logger.warning(f"Restaurant {restaurant} is not being tracked")
-            return None
-
-        restaurant_data = self.data[
-            self.data['restaurant'] == restaurant
-        ]
+    def get_follower_history(self, restaurant, days=30):
+        """Get follower counts for a restaurant over the last `days` days"""
+        try:
+            return self.follower_series.query_recent(restaurant, days)
+        except Exception as e:
+            logger.error(f"Error getting follower history: {str(e)}")
+            return pd.DataFrame(columns=['timestamp', 'followers'])
 
-        if len(restaurant_data) == 0:
+    def get_restaurant_summary(self, restaurant, snapshot=None):
+        """Get detailed summary for a specific restaurant"""
+        snapshot = snapshot or self.get_snapshot()
+        summary = snapshot.summaries.get(restaurant)
+        if summary is None:
+            # Verify restaurant is being tracked
+            if restaurant not in snapshot.restaurants:
+                logger.warning(f"Restaurant {restaurant} is not being tracked")
             return None
 
-        hashtags = []
-        for h in restaurant_data['hashtags']:
-            hashtags.extend(h.split(','))
-
-        top_hashtags = pd.Series(hashtags).value_counts().head(5)
-
-        avg_likes = restaurant_data['likes'].mean()
-        avg_comments = restaurant_data['comments'].mean()
-        followers = restaurant_data['followers'].iloc[0]
-
-        return {
-            'avg_likes': avg_likes,
-            'avg_comments': avg_comments,
-            'followers': followers,
-            'top_hashtags': top_hashtags,
-            'total_posts': len(restaurant_data)
-        }
+        return dict(summary)
 
     def __del__(self):
         """Clean up database connection"""
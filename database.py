@@ -1,27 +1,70 @@
 import sqlite3
 import logging
 from pathlib import Path
+import threading
 import time
+import weakref
 
 logger = logging.getLogger(__name__)
 
+
+class _ThreadConnection:
+    """Holds one thread's connection and closes it when the holder goes away.
+
+    The holder lives only in the thread's threading.local(), so it is
+    released, and the connection closed, when that thread exits.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+        self._finalizer = weakref.finalize(self, _close_quietly, connection)
+
+    def close(self):
+        self._finalizer()
+
+
+def _close_quietly(connection):
+    try:
+        connection.close()
+    except sqlite3.Error:
+        pass
+
+
 class Database:
-    def __init__(self):
+    def __init__(self, db_path='instagram_analytics.db'):
         """Initialize SQLite database connection"""
         logger.info("Initializing Database connection")
-        self.db_path = Path('instagram_analytics.db')
-        self.connection = None
+        self.db_path = Path(db_path)
+        # One connection per thread: sessions run on their own threads and a
+        # sqlite3 connection must not be shared between them
+        self._local = threading.local()
+        # Weak, so connections of finished threads are not kept open
+        self._holders = weakref.WeakSet()
+        self._holders_lock = threading.Lock()
         self.max_retries = 3
         self.retry_delay = 1  # seconds
         self.connect()
         self.create_tables()
 
+    @property
+    def connection(self):
+        """The calling thread's connection, or None if it has not connected"""
+        holder = getattr(self._local, 'holder', None)
+        return holder.connection if holder else None
+
     def connect(self):
-        """Establish database connection with retries"""
+        """Establish the calling thread's database connection with retries"""
+        self._discard_connection()
         for attempt in range(self.max_retries):
             try:
-                self.connection = sqlite3.connect(self.db_path)
-                self.connection.row_factory = sqlite3.Row
+                # check_same_thread is off only so close() can close every
+                # thread's connection; each one is still used by one thread
+                connection = sqlite3.connect(self.db_path, check_same_thread=False)
+                connection.row_factory = sqlite3.Row
+                holder = _ThreadConnection(connection)
+                self._local.holder = holder
+                with self._holders_lock:
+                    self._holders.add(holder)
                 logger.info("Successfully connected to the SQLite database")
                 return
             except Exception as e:
@@ -31,6 +74,14 @@ class Database:
                 else:
                     raise Exception(f"Failed to connect to database after {self.max_retries} attempts")
 
+    def _discard_connection(self):
+        """Drop the calling thread's current connection, if any"""
+        holder = getattr(self._local, 'holder', None)
+        if holder is None:
+            return
+        self._local.holder = None
+        holder.close()
+
     def create_tables(self):
         """Create necessary tables if they don't exist"""
         try:
@@ -42,6 +93,61 @@ class Database:
                         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                     )
                 """)
+                # Case-insensitive index backing handle search and paging
+                self.connection.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_restaurants_handle_nocase
+                    ON restaurants (handle COLLATE NOCASE)
+                """)
+                # Trigram full-text index backing substring handle search,
+                # kept in sync with restaurants by triggers
+                fts_exists = self.connection.execute(
+                    "SELECT 1 FROM sqlite_master WHERE name = 'restaurants_fts'"
+                ).fetchone()
+                self.connection.execute("""
+                    CREATE VIRTUAL TABLE IF NOT EXISTS restaurants_fts USING fts5(
+                        handle, content='restaurants', content_rowid='id',
+                        tokenize='trigram'
+                    )
+                """)
+                if not fts_exists:
+                    self.connection.execute(
+                        "INSERT INTO restaurants_fts (restaurants_fts) VALUES ('rebuild')"
+                    )
+                self.connection.execute("""
+                    CREATE TRIGGER IF NOT EXISTS restaurants_fts_insert
+                    AFTER INSERT ON restaurants BEGIN
+                        INSERT INTO restaurants_fts (rowid, handle)
+                        VALUES (new.id, new.handle);
+                    END
+                """)
+                self.connection.execute("""
+                    CREATE TRIGGER IF NOT EXISTS restaurants_fts_delete
+                    AFTER DELETE ON restaurants BEGIN
+                        INSERT INTO restaurants_fts (restaurants_fts, rowid, handle)
+                        VALUES ('delete', old.id, old.handle);
+                    END
+                """)
+                self.connection.execute("""
+                    CREATE TRIGGER IF NOT EXISTS restaurants_fts_update
+                    AFTER UPDATE OF handle ON restaurants BEGIN
+                        INSERT INTO restaurants_fts (restaurants_fts, rowid, handle)
+                        VALUES ('delete', old.id, old.handle);
+                        INSERT INTO restaurants_fts (rowid, handle)
+                        VALUES (new.id, new.handle);
+                    END
+                """)
+                # Follower counts per restaurant, one row per sample or rollup
+                # bucket. Timestamps are unix seconds and counts are integers
+                # so SQLite stores both as compact variable-length ints.
+                self.connection.execute("""
+                    CREATE TABLE IF NOT EXISTS follower_samples (
+                        restaurant_id INTEGER NOT NULL,
+                        tier INTEGER NOT NULL,
+                        ts INTEGER NOT NULL,
+                        followers INTEGER NOT NULL,
+                        PRIMARY KEY (restaurant_id, tier, ts)
+                    ) WITHOUT ROWID
+                """)
             logger.info("Database tables created successfully")
         except Exception as e:
             logger.error(f"Error creating tables: {str(e)}")
@@ -74,8 +180,22 @@ class Database:
             logger.error(f"Error executing query: {str(e)}")
             raise
 
+    def execute_many(self, query, params_seq):
+        """Execute a query once per parameter set in a single transaction"""
+        try:
+            self.ensure_connection()
+            with self.connection:
+                self.connection.executemany(query, params_seq)
+        except Exception as e:
+            logger.error(f"Error executing batch query: {str(e)}")
+            raise
+
     def close(self):
-        """Close the database connection"""
-        if self.connection:
-            self.connection.close()
+        """Close the database connections of all threads"""
+        with self._holders_lock:
+            holders = list(self._holders)
+        for holder in holders:
+            holder.close()
+        self._local = threading.local()
+        if holders:
             logger.info("Database connection closed")
\ No newline at end of file
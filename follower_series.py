@@ -0,0 +1,217 @@
+import logging
+import time
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Storage tiers: (tier id, bucket size in seconds, retention in seconds).
+# Raw samples are kept for a week, hourly rollups for 90 days and daily
+# rollups forever. Tiers are ordered finest to coarsest.
+RAW = 0
+HOURLY = 1
+DAILY = 2
+HOUR = 3600
+DAY = 24 * HOUR
+TIERS = [
+    (RAW, None, 7 * DAY),
+    (HOURLY, HOUR, 90 * DAY),
+    (DAILY, DAY, None),
+]
+
+# How often recording samples also triggers downsampling compaction
+COMPACTION_INTERVAL = HOUR
+
+
+def _to_epoch(value):
+    """Convert a datetime (or None for now) to integer unix seconds"""
+    if value is None:
+        return int(time.time())
+    return int(value.timestamp())
+
+
+class FollowerTimeSeries:
+    """Follower counts per restaurant stored with tiered retention.
+
+    Samples are written to the raw tier and periodically rolled up into
+    hourly and daily averages. Older raw and hourly rows are dropped once they
+    fall out of their tier's retention, so storage stays bounded per restaurant
+    apart from one row per day of history.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self._last_compaction = None
+
+    def record(self, followers_by_restaurant, timestamp=None):
+        """Record a follower sample for each restaurant handle.
+
+        Raises ValueError for a sample older than the restaurant's newest
+        hourly rollup, since compaction would never roll it up.
+        """
+        ts = _to_epoch(timestamp)
+        rows = [(ts, int(followers), handle)
+                for handle, followers in followers_by_restaurant.items()]
+        if not rows:
+            return
+
+        if timestamp is not None:
+            self._check_not_compacted(list(followers_by_restaurant), ts)
+
+        try:
+            self.db.execute_many("""
+                INSERT OR REPLACE INTO follower_samples (restaurant_id, tier, ts, followers)
+                SELECT id, 0, ?, ? FROM restaurants WHERE handle = ?
+            """, rows)
+            logger.info(f"Recorded follower samples for {len(rows)} restaurants")
+        except Exception as e:
+            logger.error(f"Error recording follower samples: {str(e)}")
+            raise
+
+        if (self._last_compaction is None or
+                time.monotonic() - self._last_compaction >= COMPACTION_INTERVAL):
+            self.compact(ts)
+
+    def _check_not_compacted(self, handles, ts):
+        """Reject a sample time that falls before a restaurant's rollup watermark"""
+        placeholders = ', '.join('?' for _ in handles)
+        rows = self.db.execute_query(f"""
+            SELECT r.handle, MAX(s.ts) AS watermark
+            FROM restaurants r JOIN follower_samples s
+              ON s.restaurant_id = r.id AND s.tier = {HOURLY}
+            WHERE r.handle IN ({placeholders})
+            GROUP BY r.handle
+        """, tuple(handles)) or []
+        late = [row['handle'] for row in rows if ts < row['watermark']]
+        if late:
+            raise ValueError(
+                f"Follower samples at {ts} are older than the compacted history of "
+                f"{', '.join(late)}"
+            )
+
+    def compact(self, now=None):
+        """Downsample completed buckets into coarser tiers and apply retention"""
+        now = now if now is not None else int(time.time())
+        try:
+            # Roll completed hours of raw samples into the hourly tier, and
+            # completed days of hourly rollups into the daily tier. Each pass
+            # starts at the restaurant's newest existing bucket, so only new
+            # data is read.
+            self._rollup(RAW, HOURLY, HOUR, now - now % HOUR)
+            self._rollup(HOURLY, DAILY, DAY, now - now % DAY)
+
+            for tier, _, retention in TIERS:
+                if retention is None:
+                    continue
+                self.db.execute_query(
+                    "DELETE FROM follower_samples WHERE tier = ? AND ts < ?",
+                    (tier, now - retention)
+                )
+            self._last_compaction = time.monotonic()
+            logger.info("Compacted follower time series")
+        except Exception as e:
+            logger.error(f"Error compacting follower time series: {str(e)}")
+            raise
+
+    def _rollup(self, source_tier, target_tier, bucket, until):
+        """Average source samples into target buckets that end before `until`.
+
+        Each restaurant is read from its own newest target bucket (inclusive),
+        a primary-key seek, so restaurants sampled at different times all
+        get rolled up.
+        """
+        self.db.execute_query("""
+            INSERT OR REPLACE INTO follower_samples (restaurant_id, tier, ts, followers)
+            SELECT s.restaurant_id, ?, s.ts - s.ts % ?,
+                   CAST(ROUND(AVG(s.followers)) AS INTEGER)
+            FROM follower_samples s
+            WHERE s.tier = ? AND s.ts < ? AND s.ts >= COALESCE(
+                (SELECT MAX(t.ts) FROM follower_samples t
+                 WHERE t.restaurant_id = s.restaurant_id AND t.tier = ?), 0)
+            GROUP BY s.restaurant_id, s.ts - s.ts % ?
+        """, (target_tier, bucket, source_tier, until, target_tier, bucket))
+
+    def _tier_for(self, start, now):
+        """Pick the finest tier whose retention still reaches back to `start`.
+
+        Coarser tiers hold fewer rows per day, so longer windows read fewer
+        rows: a week reads raw samples, a quarter hourly and anything longer
+        daily rollups.
+        """
+        for tier, bucket, retention in TIERS:
+            if retention is None or now - start <= retention:
+                return tier, bucket
+
+    def query(self, restaurant, start, end=None):
+        """Get follower history for a restaurant between two datetimes"""
+        now = int(time.time())
+        start_ts = _to_epoch(start)
+        end_ts = _to_epoch(end) if end is not None else now
+        tier, bucket = self._tier_for(start_ts, now)
+
+        try:
+            rows = self.db.execute_query("""
+                SELECT ts, followers FROM follower_samples
+                WHERE restaurant_id = (SELECT id FROM restaurants WHERE handle = ?)
+                  AND tier = ? AND ts > ? AND ts <= ?
+                ORDER BY ts
+            """, (restaurant, tier, start_ts - (bucket or 1), end_ts)) or []
+
+            if bucket:
+                # The current bucket is not rolled up yet; end the series
+                # with the newest raw sample so it reflects the latest count
+                since = rows[-1]['ts'] + bucket if rows else start_ts
+                latest = self.db.execute_query("""
+                    SELECT ts, followers FROM follower_samples
+                    WHERE restaurant_id = (SELECT id FROM restaurants WHERE handle = ?)
+                      AND tier = 0 AND ts >= ? AND ts <= ?
+                    ORDER BY ts DESC LIMIT 1
+                """, (restaurant, since, end_ts))
+                rows.extend(latest or [])
+        except Exception as e:
+            logger.error(f"Error querying follower history: {str(e)}")
+            raise
+
+        return pd.DataFrame({
+            'timestamp': [datetime.fromtimestamp(row['ts']) for row in rows],
+            'followers': [row['followers'] for row in rows]
+        })
+
+    def query_recent(self, restaurant, days):
+        """Get follower history for a restaurant over the last `days` days"""
+        return self.query(restaurant, datetime.now() - timedelta(days=days))
+
+    def latest_counts(self, at=None):
+        """Get each restaurant's newest follower count at or before `at`.
+
+        Returns a dict keyed by handle. The finest tier with a sample wins,
+        so counts older than raw retention come from the rollups. Each tier
+        lookup is a primary-key seek, one per restaurant.
+        """
+        tier_lookups = ', '.join(f"""
+            (SELECT followers FROM follower_samples
+             WHERE restaurant_id = r.id AND tier = {tier} AND ts <= :at
+             ORDER BY ts DESC LIMIT 1)""" for tier, _, _ in TIERS)
+        try:
+            rows = self.db.execute_query(f"""
+                SELECT r.handle, COALESCE({tier_lookups}) AS followers
+                FROM restaurants r
+            """, {'at': _to_epoch(at)}) or []
+        except Exception as e:
+            logger.error(f"Error reading latest follower counts: {str(e)}")
+            raise
+
+        return {row['handle']: row['followers'] for row in rows
+                if row['followers'] is not None}
+
+    def delete(self, restaurant_id):
+        """Delete all follower history for a restaurant id"""
+        try:
+            self.db.execute_query(
+                "DELETE FROM follower_samples WHERE restaurant_id = ?",
+                (restaurant_id,)
+            )
+        except Exception as e:
+            logger.error(f"Error deleting follower history: {str(e)}")
+            raise
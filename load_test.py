@@ -0,0 +1,351 @@
+"""Concurrent-session load test for the dashboard backend.
+
+Simulates N Streamlit sessions sharing one InstagramDataHandler, the way
+`st.cache_resource` shares it in main.py. Each simulated rerun makes the same
+backend calls main.py makes, and a fraction of reruns also add, remove or
+refresh restaurants first. Runs against a throwaway SQLite database seeded
+with synthetic restaurants, so no browser or real data is needed.
+
+Usage:
+    python load_test.py --sessions 20 --restaurants 5000 --duration 30
+"""
+import argparse
+import logging
+import math
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+
+from data_handler import InstagramDataHandler
+from analytics import InstagramAnalytics
+from visualization import DashboardVisualizer
+
+logger = logging.getLogger(__name__)
+
+# Seeded handles are SEED_PREFIX followed by a zero-padded number
+SEED_PREFIX = '@loadtest_'
+
+# Same page sizes main.py renders with
+RESTAURANTS_PER_PAGE = 25
+DETAIL_SELECT_LIMIT = 100
+FOLLOWER_HISTORY_DAYS = [7, 90, 365]
+
+
+class LoadTestStats:
+    """Thread-safe collection of per-operation latencies and errors"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = Counter()
+        self.logged_errors = Counter()
+        self.reruns = 0
+        self.failed_reruns = 0
+
+    def record(self, operation, seconds):
+        with self._lock:
+            self.latencies[operation].append(seconds)
+
+    def record_error(self, operation, error):
+        with self._lock:
+            message = normalize_message(f"{type(error).__name__}: {error}")
+            self.errors[(operation, message)] += 1
+
+    def record_logged_error(self, logger_name, message):
+        with self._lock:
+            self.logged_errors[(logger_name, normalize_message(message))] += 1
+
+    def record_rerun(self, seconds, failed):
+        with self._lock:
+            self.latencies['rerun'].append(seconds)
+            self.reruns += 1
+            if failed:
+                self.failed_reruns += 1
+
+
+class ErrorLogCollector(logging.Handler):
+    """Counts ERROR records the app logs for failures it handles itself.
+
+    Several read paths (e.g. get_tracked_restaurants) log and return an empty
+    result instead of raising, so their failures never reach the session.
+    """
+
+    def __init__(self, stats):
+        super().__init__(level=logging.ERROR)
+        self.stats = stats
+
+    def emit(self, record):
+        self.stats.record_logged_error(record.name, record.getMessage())
+
+
+def normalize_message(message):
+    """Strip thread ids so the same error from different threads groups together"""
+    return re.sub(r'thread id \d+', 'thread id N', message)
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class DashboardSession:
+    """One simulated browser session issuing dashboard reruns"""
+
+    def __init__(self, session_id, data_handler, analytics, visualizer, stats,
+                 handles, write_ratio, seed):
+        self.session_id = session_id
+        self.data_handler = data_handler
+        self.analytics = analytics
+        self.visualizer = visualizer
+        self.stats = stats
+        self.handles = handles
+        self.write_ratio = write_ratio
+        self.random = random.Random(seed)
+        self.added = []
+        self.add_count = 0
+
+    def timed(self, operation, func, *args, **kwargs):
+        """Run one backend call, recording its latency or error"""
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        except Exception as e:
+            self.stats.record_error(operation, e)
+            raise
+        finally:
+            self.stats.record(operation, time.perf_counter() - start)
+
+    def write(self):
+        """Add, remove or refresh, like the sidebar buttons do"""
+        action = self.random.choice(['add', 'remove', 'refresh'])
+        if action == 'remove' and not self.added:
+            action = 'add'
+
+        if action == 'add':
+            self.add_count += 1
+            handle = f"@loadtest_s{self.session_id}_{self.add_count}"
+            self.timed('add_restaurant', self.data_handler.add_restaurant, handle)
+            self.added.append(handle)
+        elif action == 'remove':
+            handle = self.added.pop(self.random.randrange(len(self.added)))
+            self.timed('remove_restaurant', self.data_handler.remove_restaurant, handle)
+        else:
+            self.timed('refresh_data', self.data_handler.refresh_data)
+
+    def pick_search(self):
+        """Pick a sidebar search the way a user might type one.
+
+        Half the reruns have no search. The rest narrow the list, either with
+        a handle prefix or with a substring of a handle's number.
+        """
+        mode = self.random.choice(['none', 'none', 'prefix', 'substring'])
+        if mode == 'none':
+            return '', False
+        handle = self.random.choice(self.handles)
+        number = handle[len(SEED_PREFIX):]
+        if mode == 'prefix':
+            # Go past the zero padding, which every seeded handle shares
+            padding = len(number) - len(number.lstrip('0'))
+            length = self.random.randint(min(padding + 1, len(number)), len(number))
+            return SEED_PREFIX + number[:length], False
+        length = self.random.randint(3, len(number))
+        start = self.random.randint(0, len(number) - length)
+        return number[start:start + length], True
+
+    def rerun(self):
+        """Make the backend calls of one main.py rerun"""
+        timed = self.timed
+        data_handler = self.data_handler
+        analytics = self.analytics
+        visualizer = self.visualizer
+
+        if self.random.random() < self.write_ratio:
+            self.write()
+
+        # Sidebar: tracked-restaurant page with an occasional search
+        total_restaurants = timed('count_restaurants', data_handler.count_restaurants)
+        search_query, substring = self.pick_search()
+        match_count = timed('count_restaurants', data_handler.count_restaurants,
+                            search_query, substring=substring)
+        if total_restaurants is None or match_count is None:
+            # main.py shows an error here instead of the dashboard
+            raise RuntimeError("count_restaurants failed")
+        page_count = max(1, -(-match_count // RESTAURANTS_PER_PAGE))
+        page = self.random.randint(1, page_count)
+        timed('search_restaurants', data_handler.search_restaurants, search_query,
+              limit=RESTAURANTS_PER_PAGE, offset=(page - 1) * RESTAURANTS_PER_PAGE,
+              substring=substring)
+
+        snapshot = timed('get_snapshot', analytics.get_snapshot)
+        if not total_restaurants:
+            return
+
+        top_restaurants = timed('get_top_restaurants', analytics.get_top_restaurants,
+                                snapshot=snapshot)
+        if not top_restaurants.empty:
+            timed('create_engagement_bar_chart',
+                  visualizer.create_engagement_bar_chart, top_restaurants)
+
+        trending_restaurants = timed('get_trending_restaurants',
+                                     analytics.get_trending_restaurants, snapshot=snapshot)
+        if not trending_restaurants.empty:
+            timed('create_trend_line_chart',
+                  visualizer.create_trend_line_chart, trending_restaurants)
+
+        top_hashtags = timed('get_top_hashtags', analytics.get_top_hashtags,
+                             snapshot=snapshot)
+        if not top_hashtags.empty:
+            timed('create_hashtag_bubble_chart',
+                  visualizer.create_hashtag_bubble_chart, top_hashtags)
+
+        # Detail view: users pick any handle from the selectbox matches
+        restaurants = timed('search_restaurants', data_handler.search_restaurants,
+                            '', limit=DETAIL_SELECT_LIMIT)
+        if not restaurants:
+            return
+        selected_restaurant = self.random.choice(restaurants)
+        summary = timed('get_restaurant_summary', analytics.get_restaurant_summary,
+                        selected_restaurant, snapshot=snapshot)
+        if summary:
+            timed('create_restaurant_summary_cards',
+                  visualizer.create_restaurant_summary_cards, summary)
+            history = timed('get_follower_history', analytics.get_follower_history,
+                            selected_restaurant, self.random.choice(FOLLOWER_HISTORY_DAYS))
+            if not history.empty:
+                timed('create_follower_history_chart',
+                      visualizer.create_follower_history_chart, history)
+
+    def run(self, deadline, max_reruns=None):
+        count = 0
+        while time.perf_counter() < deadline and (max_reruns is None or count < max_reruns):
+            start = time.perf_counter()
+            failed = False
+            try:
+                self.rerun()
+            except Exception:
+                # main.py catches render errors and shows them; keep going too
+                failed = True
+            self.stats.record_rerun(time.perf_counter() - start, failed)
+            count += 1
+
+
+def seed_restaurants(data_handler, count):
+    """Insert `count` synthetic restaurant handles and load their data"""
+    handles = [f"{SEED_PREFIX}{i:06d}" for i in range(count)]
+    data_handler.db.execute_many(
+        "INSERT OR IGNORE INTO restaurants (handle) VALUES (?)",
+        [(handle,) for handle in handles]
+    )
+    data_handler.refresh_data()
+    return handles
+
+
+def print_report(stats, elapsed, sessions, data_handler):
+    """Print latency percentiles, throughput and errors"""
+    print()
+    print(f"Sessions: {sessions}   Duration: {elapsed:.1f}s   "
+          f"Reruns: {stats.reruns} ({stats.failed_reruns} failed)   "
+          f"Throughput: {stats.reruns / elapsed:.1f} reruns/s")
+    print()
+    print(f"{'operation':<34}{'calls':>8}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for operation in sorted(stats.latencies, key=lambda op: (op != 'rerun', op)):
+        values = stats.latencies[operation]
+        print(f"{operation:<34}{len(values):>8}"
+              f"{percentile(values, 50) * 1000:>10.1f}"
+              f"{percentile(values, 99) * 1000:>10.1f}"
+              f"{max(values) * 1000:>10.1f}")
+
+    for title, errors in [("Errors raised", stats.errors),
+                          ("Errors logged and handled by the app", stats.logged_errors)]:
+        print()
+        if not errors:
+            print(f"{title}: none")
+            continue
+        locked = sum(n for (_, message), n in errors.items() if 'locked' in message)
+        print(f"{title}: {sum(errors.values())} ({locked} SQLite locking)")
+        for (source, message), n in errors.most_common():
+            print(f"  {n:>6}  {source}: {message}")
+
+    print()
+    print(f"Live data snapshots at end: {data_handler.get_live_snapshot_versions()}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sessions', type=int, default=10,
+                        help="number of concurrent simulated sessions")
+    parser.add_argument('--restaurants', type=int, default=500,
+                        help="number of synthetic restaurants to seed")
+    parser.add_argument('--duration', type=float, default=20.0,
+                        help="seconds to run for")
+    parser.add_argument('--reruns', type=int, default=None,
+                        help="stop each session after this many reruns")
+    parser.add_argument('--write-ratio', type=float, default=0.05,
+                        help="fraction of reruns that add, remove or refresh first")
+    parser.add_argument('--db', default=None,
+                        help="new SQLite file to create and keep for inspection "
+                             "(default: a temporary file); must not already exist")
+    parser.add_argument('--seed', type=int, default=0,
+                        help="random seed for the session mix and synthetic data")
+    parser.add_argument('--verbose', action='store_true',
+                        help="keep the app's own log output")
+    args = parser.parse_args(argv)
+    # Seeding writes synthetic handles, so never point it at a real database
+    if args.db and Path(args.db).exists():
+        parser.error(f"--db {args.db} already exists; give a path for a new file")
+
+    stats = LoadTestStats()
+    root_logger = logging.getLogger()
+    if not args.verbose:
+        # The app logs every query at INFO; only the report is printed
+        for handler in root_logger.handlers[:]:
+            root_logger.removeHandler(handler)
+        root_logger.setLevel(logging.ERROR)
+    root_logger.addHandler(ErrorLogCollector(stats))
+    random.seed(args.seed)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = args.db or str(Path(tmp_dir) / 'load_test.db')
+        print(f"Seeding {args.restaurants} synthetic restaurants into {db_path}")
+        data_handler = InstagramDataHandler(db_path)
+        handles = seed_restaurants(data_handler, args.restaurants)
+        analytics = InstagramAnalytics(data_handler)
+        visualizer = DashboardVisualizer()
+        # Only count errors from the timed run, not from seeding
+        stats.logged_errors.clear()
+
+        sessions = [
+            DashboardSession(i, data_handler, analytics, visualizer, stats,
+                             handles, args.write_ratio, args.seed + i)
+            for i in range(args.sessions)
+        ]
+        print(f"Running {args.sessions} sessions for up to {args.duration:.0f}s")
+        start = time.perf_counter()
+        deadline = start + args.duration
+        threads = [
+            threading.Thread(target=session.run, args=(deadline, args.reruns), daemon=True)
+            for session in sessions
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        print_report(stats, elapsed, args.sessions, data_handler)
+        data_handler.db.close()
+
+    return 1 if stats.errors or stats.logged_errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
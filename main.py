@@ -1,10 +1,11 @@
 import streamlit as st
 import pandas as pd
-from data_handler import InstagramDataHandler
+from data_handler import InstagramDataHandler, MIN_SUBSTRING_QUERY_LENGTH
 from analytics import InstagramAnalytics
 from visualization import DashboardVisualizer
 from datetime import datetime
 import logging
+import math
 import sys
 
 # Configure logging
@@ -15,6 +16,18 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Sidebar and detail selector only ever render this many handles per rerun
+RESTAURANTS_PER_PAGE = 25
+DETAIL_SELECT_LIMIT = 100
+
+# Follower history windows offered in the detail view, in days
+FOLLOWER_HISTORY_RANGES = {
+    "Last 7 days": 7,
+    "Last 90 days": 90,
+    "Last year": 365,
+    "Last 3 years": 3 * 365,
+}
+
 try:
     # Page config
     st.set_page_config(
@@ -74,11 +87,52 @@ try:
                 logger.error(f"Failed to add restaurant: {str(e)}", exc_info=True)
                 st.sidebar.error(f"Failed to add restaurant: {str(e)}")
 
-    # Show current restaurants
-    current_restaurants = data_handler.get_tracked_restaurants()
-    if current_restaurants:
+    # Show current restaurants, one page at a time
+    total_restaurants = data_handler.count_restaurants()
+    if total_restaurants is None:
+        st.error("Failed to load tracked restaurants. Please refresh the page.")
+        st.stop()
+    if total_restaurants:
         st.sidebar.header("Tracked Restaurants")
-        for restaurant in current_restaurants:
+        search_query = st.sidebar.text_input(
+            "Search handles",
+            key="restaurant_search"
+        )
+        match_anywhere = st.sidebar.checkbox(
+            "Match anywhere in handle",
+            key="restaurant_search_anywhere"
+        )
+        if match_anywhere and 0 < len(search_query.strip()) < MIN_SUBSTRING_QUERY_LENGTH:
+            st.sidebar.caption(
+                f"Type at least {MIN_SUBSTRING_QUERY_LENGTH} characters to match "
+                "anywhere; showing handles that start with your search"
+            )
+        match_count = data_handler.count_restaurants(search_query, substring=match_anywhere)
+        if match_count is None:
+            st.sidebar.error("Failed to search restaurants")
+            match_count = 0
+        page_count = max(1, math.ceil(match_count / RESTAURANTS_PER_PAGE))
+        page = st.sidebar.number_input(
+            f"Page (of {page_count})",
+            min_value=1,
+            max_value=page_count,
+            value=1,
+            step=1
+        )
+        page_restaurants = data_handler.search_restaurants(
+            search_query,
+            limit=RESTAURANTS_PER_PAGE,
+            offset=(page - 1) * RESTAURANTS_PER_PAGE,
+            substring=match_anywhere
+        )
+        if page_restaurants:
+            first = (page - 1) * RESTAURANTS_PER_PAGE + 1
+            st.sidebar.caption(
+                f"Showing {first}-{first + len(page_restaurants) - 1} of {match_count}"
+            )
+        elif match_count == 0:
+            st.sidebar.caption("No restaurants match your search")
+        for restaurant in page_restaurants:
             col1, col2 = st.sidebar.columns([3, 1])
             col1.write(restaurant)
             if col2.button("Remove", key=f"remove_{restaurant}"):
@@ -94,13 +148,17 @@ try:
             logger.error(f"Failed to refresh data: {str(e)}", exc_info=True)
             st.error(f"Failed to refresh data: {str(e)}")
 
+    # Pin one data snapshot so every chart in this rerun sees the same data,
+    # even if another session refreshes or edits the list meanwhile
+    snapshot = analytics.get_snapshot()
+
     # Export Data Button
-    if current_restaurants:
+    if total_restaurants:
         st.sidebar.markdown("---")
         st.sidebar.header("Export Data")
         if st.sidebar.button("Export Analytics to CSV"):
             try:
-                export_data = data_handler.get_analytics_export_data()
+                export_data = data_handler.get_analytics_export_data(snapshot)
                 if not export_data.empty:
                     csv = export_data.to_csv(index=False)
                     st.sidebar.download_button(
@@ -118,13 +176,13 @@ try:
 
     try:
         # Only show analytics if there are restaurants being tracked
-        if current_restaurants:
+        if total_restaurants:
             # Top restaurants by engagement
             st.header("📈 Top Performing Restaurants")
             col1, col2 = st.columns(2)
 
             with col1:
-                top_restaurants = analytics.get_top_restaurants()
+                top_restaurants = analytics.get_top_restaurants(snapshot=snapshot)
                 if not top_restaurants.empty:
                     st.plotly_chart(
                         visualizer.create_engagement_bar_chart(top_restaurants),
@@ -134,7 +192,7 @@ try:
                     st.info("No engagement data available")
 
             with col2:
-                trending_restaurants = analytics.get_trending_restaurants()
+                trending_restaurants = analytics.get_trending_restaurants(snapshot=snapshot)
                 if not trending_restaurants.empty:
                     st.plotly_chart(
                         visualizer.create_trend_line_chart(trending_restaurants),
@@ -145,7 +203,7 @@ try:
 
             # Hashtag analysis
             st.header("🏷️ Hashtag Analysis")
-            top_hashtags = analytics.get_top_hashtags()
+            top_hashtags = analytics.get_top_hashtags(snapshot=snapshot)
             if not top_hashtags.empty:
                 st.plotly_chart(
                     visualizer.create_hashtag_bubble_chart(top_hashtags),
@@ -156,15 +214,26 @@ try:
 
             # Restaurant detailed analysis
             st.header("🔍 Restaurant Detail Analysis")
-            restaurants = data_handler.get_tracked_restaurants()
+            detail_query = st.text_input(
+                "Search restaurants to analyze (handle prefix):",
+                key="detail_search"
+            )
+            restaurants = data_handler.search_restaurants(
+                detail_query,
+                limit=DETAIL_SELECT_LIMIT
+            )
             if len(restaurants) > 0:
+                if len(restaurants) == DETAIL_SELECT_LIMIT:
+                    st.caption(
+                        f"Showing the first {DETAIL_SELECT_LIMIT} matches; refine the search to narrow the list"
+                    )
                 selected_restaurant = st.selectbox(
                     "Select a restaurant to analyze:",
                     restaurants
                 )
 
                 if selected_restaurant:
-                    summary = analytics.get_restaurant_summary(selected_restaurant)
+                    summary = analytics.get_restaurant_summary(selected_restaurant, snapshot=snapshot)
                     if summary:
                         st.plotly_chart(
                             visualizer.create_restaurant_summary_cards(summary),
@@ -173,10 +242,27 @@ try:
 
                         st.subheader("Top Hashtags for " + selected_restaurant)
                         st.write(summary['top_hashtags'])
+
+                        st.subheader("Follower History for " + selected_restaurant)
+                        history_range = st.selectbox(
+                            "Time range:",
+                            list(FOLLOWER_HISTORY_RANGES.keys())
+                        )
+                        history = analytics.get_follower_history(
+                            selected_restaurant,
+                            FOLLOWER_HISTORY_RANGES[history_range]
+                        )
+                        if not history.empty:
+                            st.plotly_chart(
+                                visualizer.create_follower_history_chart(history),
+                                use_container_width=True
+                            )
+                        else:
+                            st.info("No follower history recorded yet")
                     else:
                         st.warning("No data available for selected restaurant")
             else:
-                st.info("No restaurant data available")
+                st.info("No tracked restaurants match your search")
 
             # Footer with last update time
             st.markdown("---")
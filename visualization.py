@@ -45,6 +45,18 @@ class DashboardVisualizer:
         fig.update_layout(xaxis_tickangle=-45)
         return fig
     
+    def create_follower_history_chart(self, history):
+        """Create line chart for follower counts over time"""
+        fig = px.line(
+            history,
+            x='timestamp',
+            y='followers',
+            title='Follower History',
+            labels={'timestamp': 'Date', 'followers': 'Followers'},
+            markers=True
+        )
+        return fig
+    
     def create_restaurant_summary_cards(self, summary):
         """Create summary metrics cards"""
         metrics = go.Figure()